@@ -2,8 +2,51 @@
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 from abc import ABC, abstractmethod
-from typing import Optional
+from collections import OrderedDict
+from threading import Lock
+from typing import Iterator, List, Optional, Tuple
+
+
+# =========================
+# Response cache
+# =========================
+
+# Shared across all client instances (keyed by model name, so no mixups).
+# Pipeline prompts are deterministic at low temperature, and iterative use
+# (Streamlit reruns, pipeline debugging where only a late step changes)
+# re-issues byte-identical prompts — skip the network round-trip for those.
+_CACHE_MAX_ENTRIES = 256
+_CACHE_TEMPERATURE_CUTOFF = 0.2  # only near-deterministic calls are cached
+
+_response_cache: "OrderedDict[Tuple[str, Optional[float], str], str]" = OrderedDict()
+_response_cache_lock = Lock()
+
+
+def _cache_key(model_name: str, temperature: Optional[float], prompt: str):
+    """Return the cache key, or None if this call should not be cached."""
+    if temperature is not None and temperature > _CACHE_TEMPERATURE_CUTOFF:
+        return None
+    digest = hashlib.blake2b(prompt.encode("utf-8"), digest_size=16).hexdigest()
+    return (model_name, temperature, digest)
+
+
+def _cache_get(key) -> Optional[str]:
+    with _response_cache_lock:
+        value = _response_cache.get(key)
+        if value is not None:
+            _response_cache.move_to_end(key)  # LRU bookkeeping
+        return value
+
+
+def _cache_put(key, value: str) -> None:
+    with _response_cache_lock:
+        _response_cache[key] = value
+        _response_cache.move_to_end(key)
+        while len(_response_cache) > _CACHE_MAX_ENTRIES:
+            _response_cache.popitem(last=False)
 
 
 class BaseLLMClient(ABC):
@@ -35,3 +78,69 @@ class BaseLLMClient(ABC):
             - Return the *raw* LLM text (no JSON parsing here)
         """
         raise NotImplementedError
+
+    async def agenerate(self, prompt: str, *, temperature: Optional[float] = None) -> str:
+        """
+        Asynchronous counterpart of generate().
+
+        Default implementation runs the blocking generate() in a worker thread,
+        so providers without a native async SDK still work with arun_pipeline().
+        Providers that ship an async SDK (Groq, OpenAI) override this with a
+        true non-blocking call so concurrent calls overlap on the network.
+        """
+        return await asyncio.to_thread(self.generate, prompt, temperature=temperature)
+
+    def generate_cached(self, prompt: str, *, temperature: Optional[float] = None) -> str:
+        """
+        generate() with a shared LRU response cache.
+
+        Only near-deterministic calls (temperature <= 0.2, including the
+        clients' 0.1 default) are cached; higher temperatures always hit the
+        provider.
+        """
+        key = _cache_key(self.model_name, temperature, prompt)
+        if key is not None:
+            cached = _cache_get(key)
+            if cached is not None:
+                return cached
+
+        result = self.generate(prompt, temperature=temperature)
+        if key is not None:
+            _cache_put(key, result)
+        return result
+
+    def stream_generate(self, prompt: str, *, temperature: Optional[float] = None) -> Iterator[str]:
+        """
+        Yield the response as text chunks as they arrive.
+
+        Default implementation yields the full generate() output as a single
+        chunk; providers with streaming support (Groq, OpenAI) override this
+        with `stream=True` so consumers see tokens at first-token latency
+        instead of waiting for the whole completion.
+        """
+        yield self.generate(prompt, temperature=temperature)
+
+    def batch_generate(self, prompts: List[str], *, temperature: Optional[float] = None) -> List[str]:
+        """
+        Generate outputs for many prompts in one logical call.
+
+        Default implementation loops over generate_cached; providers with a
+        Batch API (Groq, OpenAI) override this to submit a single batch job,
+        which is the right trade for throughput-bound offline runs.
+        """
+        return [self.generate_cached(p, temperature=temperature) for p in prompts]
+
+    async def agenerate_cached(self, prompt: str, *, temperature: Optional[float] = None) -> str:
+        """
+        Async variant of generate_cached, backed by the same shared cache.
+        """
+        key = _cache_key(self.model_name, temperature, prompt)
+        if key is not None:
+            cached = _cache_get(key)
+            if cached is not None:
+                return cached
+
+        result = await self.agenerate(prompt, temperature=temperature)
+        if key is not None:
+            _cache_put(key, result)
+        return result
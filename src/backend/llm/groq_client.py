@@ -2,11 +2,20 @@
 
 from __future__ import annotations
 
-from typing import Optional
+from typing import Iterator, List, Optional
 
-from groq import Groq
+import httpx
+from groq import AsyncGroq, Groq
 
 from .base_client import BaseLLMClient
+from .batch_client import submit_batch
+from .http_pool import build_async_http_client, build_http_client
+
+# Shared pooled transports so every GroqClient (and repeated make_llm_client
+# calls) reuses the same keep-alive TCP+TLS connections instead of paying a
+# fresh handshake per step call.
+_HTTP_CLIENT: httpx.Client = build_http_client()
+_ASYNC_HTTP_CLIENT: httpx.AsyncClient = build_async_http_client()
 
 
 class GroqClient(BaseLLMClient):
@@ -23,7 +32,8 @@ class GroqClient(BaseLLMClient):
 
     def __init__(self, api_key: str, model_name: str) -> None:
         super().__init__(model_name=model_name)
-        self._client = Groq(api_key=api_key)
+        self._client = Groq(api_key=api_key, http_client=_HTTP_CLIENT)
+        self._aclient = AsyncGroq(api_key=api_key, http_client=_ASYNC_HTTP_CLIENT)
 
     def generate(self, prompt: str, *, temperature: Optional[float] = None) -> str:
         """
@@ -40,3 +50,57 @@ class GroqClient(BaseLLMClient):
         )
 
         return response.choices[0].message.content
+
+    def stream_generate(self, prompt: str, *, temperature: Optional[float] = None) -> Iterator[str]:
+        """
+        Stream the completion as text chunks (stream=True).
+        """
+        if temperature is None:
+            temperature = 0.1
+
+        response = self._client.chat.completions.create(
+            model=self.model_name,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=2048,
+            temperature=temperature,
+            stream=True,
+        )
+
+        for chunk in response:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+    def batch_generate(self, prompts: List[str], *, temperature: Optional[float] = None) -> List[str]:
+        """
+        Submit all prompts through the Groq Batch API as one job.
+        """
+        if temperature is None:
+            temperature = 0.1
+        return submit_batch(
+            self._client,
+            prompts,
+            model_name=self.model_name,
+            temperature=temperature,
+        )
+
+    async def agenerate(self, prompt: str, *, temperature: Optional[float] = None) -> str:
+        """
+        Async variant of generate() using the AsyncGroq SDK client.
+
+        Independent calls (e.g., run_batch over multiple queries) can be
+        awaited concurrently with asyncio.gather to overlap network latency.
+        """
+        if temperature is None:
+            temperature = 0.1
+
+        response = await self._aclient.chat.completions.create(
+            model=self.model_name,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=2048,
+            temperature=temperature,
+        )
+
+        return response.choices[0].message.content
@@ -0,0 +1,36 @@
+# src/backend/llm/http_pool.py
+
+from __future__ import annotations
+
+import httpx
+
+
+# Pool sizing / timeouts shared by all providers.
+# Successive step1→step6 calls (and concurrent batch runs) reuse warm
+# keep-alive connections, avoiding a ~100–300ms TLS handshake per call.
+_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+_TIMEOUT = httpx.Timeout(60.0, connect=10.0)
+_RETRIES = 2  # transport-level retries for connect errors only
+
+
+def build_http_client() -> httpx.Client:
+    """
+    Build a pooled sync httpx client suitable for the provider SDKs'
+    `http_client=` parameter.
+    """
+    return httpx.Client(
+        limits=_LIMITS,
+        timeout=_TIMEOUT,
+        transport=httpx.HTTPTransport(retries=_RETRIES),
+    )
+
+
+def build_async_http_client() -> httpx.AsyncClient:
+    """
+    Async counterpart of build_http_client for AsyncGroq/AsyncOpenAI.
+    """
+    return httpx.AsyncClient(
+        limits=_LIMITS,
+        timeout=_TIMEOUT,
+        transport=httpx.AsyncHTTPTransport(retries=_RETRIES),
+    )
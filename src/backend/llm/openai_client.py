@@ -2,11 +2,19 @@
 
 from __future__ import annotations
 
-from typing import Optional
+from typing import Iterator, List, Optional
 
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, OpenAI
 
 from .base_client import BaseLLMClient
+from .batch_client import submit_batch
+from .http_pool import build_async_http_client, build_http_client
+
+# Shared pooled transports (see http_pool.py) so repeated calls reuse
+# keep-alive connections instead of reconnecting per request.
+_HTTP_CLIENT: httpx.Client = build_http_client()
+_ASYNC_HTTP_CLIENT: httpx.AsyncClient = build_async_http_client()
 
 
 class OpenAIClient(BaseLLMClient):
@@ -25,7 +33,8 @@ class OpenAIClient(BaseLLMClient):
         # NOTE:
         # The new OpenAI Python SDK uses `OpenAI(api_key=...)`
         # See: https://platform.openai.com/docs/api-reference/introduction
-        self._client = OpenAI(api_key=api_key)
+        self._client = OpenAI(api_key=api_key, http_client=_HTTP_CLIENT)
+        self._aclient = AsyncOpenAI(api_key=api_key, http_client=_ASYNC_HTTP_CLIENT)
 
     def generate(self, prompt: str, *, temperature: Optional[float] = None) -> str:
         """
@@ -49,3 +58,55 @@ class OpenAIClient(BaseLLMClient):
         # New OpenAI SDK returns:
         # response.choices[0].message.content
         return response.choices[0].message.content
+
+    def stream_generate(self, prompt: str, *, temperature: Optional[float] = None) -> Iterator[str]:
+        """
+        Stream the completion as text chunks (stream=True).
+        """
+        if temperature is None:
+            temperature = 0.1
+
+        response = self._client.chat.completions.create(
+            model=self.model_name,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=2048,
+            stream=True,
+        )
+
+        for chunk in response:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+    def batch_generate(self, prompts: List[str], *, temperature: Optional[float] = None) -> List[str]:
+        """
+        Submit all prompts through the OpenAI Batch API as one job
+        (50% cost, higher rate limits; latency traded for throughput).
+        """
+        if temperature is None:
+            temperature = 0.1
+        return submit_batch(
+            self._client,
+            prompts,
+            model_name=self.model_name,
+            temperature=temperature,
+        )
+
+    async def agenerate(self, prompt: str, *, temperature: Optional[float] = None) -> str:
+        """
+        Async variant of generate() using the AsyncOpenAI SDK client.
+        """
+        if temperature is None:
+            temperature = 0.1
+
+        response = await self._aclient.chat.completions.create(
+            model=self.model_name,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=2048,
+        )
+
+        return response.choices[0].message.content
@@ -2,76 +2,81 @@
 
 from __future__ import annotations
 
-import re
+import string
 from functools import lru_cache
 from pathlib import Path
-from typing import Literal
+from typing import Dict, Literal, Optional, Tuple
 
 
 PROJECT_ROOT = Path(__file__).resolve().parents[3]
 PROMPTS_PATH = PROJECT_ROOT / "docs" / "06_prompts.md"
 
 
-StepName = Literal["step1", "step2", "step3", "step4", "step5", "step6"]
+# "step12" is the optional fused Step 1+2 prompt (one call, two outputs).
+StepName = Literal["step1", "step2", "step3", "step4", "step5", "step6", "step12"]
 
 
-@lru_cache(maxsize=1)
-def _read_prompts_file() -> str:
-    """Read the full 06_prompts.md content (cached)."""
-    return PROMPTS_PATH.read_text(encoding="utf-8")
+# Boundary tokens in docs/06_prompts.md. Every per-step section starts with
+# "# Step N ..." at column 0 and carries its template in the first ```text
+# block; the fused section uses a distinct header so it never collides with
+# the numeric ones.
+_STEP_BOUNDARY = "\n# Step "
+_FUSED_BOUNDARY = "\n# Fused Step 1+2"
+_TEXT_FENCE = "```text"
+_FENCE = "```"
 
 
-def _extract_step_section(raw: str, step_number: int) -> str:
-    """
-    Get the markdown section for a given step, e.g. between:
+def _extract_text_block(section: str) -> Optional[str]:
+    """First ```text ... ``` block of a section, or None if there is none."""
+    _head, sep, rest = section.partition(_TEXT_FENCE)
+    if not sep:
+        return None
+    return rest.split(_FENCE, 1)[0].strip()
 
-        # Step 1 — ...
-        ...
-        # Step 2 — ...
 
-    If it is the last step, slice until end of file.
+def _parse_templates(raw: str) -> Dict[str, str]:
     """
-    # Pattern like "# Step 1" (allow extra text after the number)
-    pattern = rf"^#\s*Step\s+{step_number}\b.*$"
-    matches = list(re.finditer(pattern, raw, flags=re.MULTILINE))
-    if not matches:
-        raise ValueError(f"Could not find header for Step {step_number} in 06_prompts.md")
+    Slice 06_prompts.md into step templates in a single pass.
 
-    start = matches[0].start()
+    Plain str.split/partition only — no regex — so the whole file is scanned
+    exactly once, at import. Each chunk after a "# Step " boundary starts
+    with its step number; chunks that don't (or that lack a ```text block,
+    like the "Step-by-Step" overview heading) are skipped.
+    """
+    templates: Dict[str, str] = {}
 
-    # Find next "# Step {n+1}" header (if any) to bound the section
-    next_pattern = rf"^#\s*Step\s+{step_number + 1}\b.*$"
-    next_match = re.search(next_pattern, raw[start + 1 :], flags=re.MULTILINE)
-    if next_match:
-        end = start + 1 + next_match.start()
-    else:
-        end = len(raw)
+    for chunk in ("\n" + raw).split(_STEP_BOUNDARY)[1:]:
+        number = chunk.split(None, 1)[0] if chunk.split(None, 1) else ""
+        if not number.isdigit():
+            continue
+        body = _extract_text_block(chunk)
+        if body is not None:
+            # First occurrence wins; a step's own ```text block always
+            # precedes any later section swallowed into the same chunk.
+            templates.setdefault(f"step{int(number)}", body)
 
-    return raw[start:end]
+    fused_idx = ("\n" + raw).find(_FUSED_BOUNDARY)
+    if fused_idx != -1:
+        body = _extract_text_block(("\n" + raw)[fused_idx:])
+        if body is not None:
+            templates["step12"] = body
 
+    return templates
 
-def _extract_text_block(section: str) -> str:
-    """
-    Extract the first ```text ... ``` code block from a section.
 
-    The prompts are written as:
+def _read_prompts_file() -> str:
+    """Read the full 06_prompts.md content."""
+    return PROMPTS_PATH.read_text(encoding="utf-8")
 
-        ## Prompt Template
-        ```text
-        ...
-        ```
-    """
-    code_block_pattern = r"```text(.*?)```"
-    match = re.search(code_block_pattern, section, flags=re.DOTALL)
-    if not match:
-        raise ValueError("No ```text``` block found in step section.")
-    # Strip leading/trailing whitespace
-    return match.group(1).strip()
+
+# Parsed once at import; the prompts file is a static part of the repo.
+_TEMPLATES: Dict[str, str] = _parse_templates(_read_prompts_file())
 
 
 def load_step_prompt(step: StepName) -> str:
     """
-    Load the prompt template for a given step.
+    Load the prompt template for a given step — a dict lookup; all parsing
+    happened once at module import.
 
     Example:
         prompt = load_step_prompt("step1")
@@ -88,10 +93,28 @@ def load_step_prompt(step: StepName) -> str:
       - Optionally validate required placeholders per step
         (e.g., ensure {USER_QUERY}, {DATASET_SCHEMA} exist for step1).
     """
-    raw = _read_prompts_file()
+    try:
+        return _TEMPLATES[step]
+    except KeyError as exc:
+        raise ValueError(f"No prompt template found for '{step}' in 06_prompts.md") from exc
+
+
+# A parsed template segment: (literal_text, placeholder_name_or_None).
+PromptSegment = Tuple[str, Optional[str]]
+
 
-    # Convert "step1" -> 1, etc.
-    step_number = int(step.replace("step", ""))
-    section = _extract_step_section(raw, step_number)
-    template = _extract_text_block(section)
-    return template
+@lru_cache(maxsize=None)
+def load_step_prompt_segments(step: StepName) -> Tuple[PromptSegment, ...]:
+    """
+    Parse the step template into (literal, placeholder) segments, once.
+
+    The templates are >95% static text; pre-splitting them lets callers
+    assemble prompts with a single "".join over literals + looked-up values
+    instead of re-scanning the whole template with str.format_map per call.
+    """
+    segments = []
+    for literal, field_name, _format_spec, _conversion in string.Formatter().parse(
+        load_step_prompt(step)
+    ):
+        segments.append((literal, field_name))
+    return tuple(segments)
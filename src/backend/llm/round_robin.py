@@ -0,0 +1,56 @@
+# src/backend/llm/round_robin.py
+
+from __future__ import annotations
+
+import itertools
+from threading import Lock
+from typing import Iterator, List, Optional, Sequence
+
+from .base_client import BaseLLMClient
+
+
+class RoundRobinClient(BaseLLMClient):
+    """
+    Dispatch calls across a pool of same-model clients, one key each.
+
+    Single-key throughput is capped by the provider's per-key rate limit;
+    rotating step calls over K keys multiplies effective QPM by ~K with no
+    algorithmic change. Combined with the async batch path, asyncio.gather
+    over per-query pipelines naturally fans out across the pool.
+
+    All pooled clients must target the same model so the shared response
+    cache (keyed by model name) stays correct.
+    """
+
+    def __init__(self, clients: Sequence[BaseLLMClient]) -> None:
+        if not clients:
+            raise ValueError("RoundRobinClient needs at least one client.")
+        super().__init__(model_name=clients[0].model_name)
+        for client in clients:
+            if client.model_name != self.model_name:
+                raise ValueError(
+                    "RoundRobinClient requires all clients to share a model "
+                    f"(got {client.model_name!r} vs {self.model_name!r})."
+                )
+        self._clients = tuple(clients)
+        self._pool = itertools.cycle(self._clients)
+        # itertools.cycle.__next__ isn't atomic under free-threading and the
+        # pipeline calls in from worker threads (asyncio.to_thread).
+        self._pool_lock = Lock()
+
+    def _next(self) -> BaseLLMClient:
+        with self._pool_lock:
+            return next(self._pool)
+
+    def generate(self, prompt: str, *, temperature: Optional[float] = None) -> str:
+        return self._next().generate(prompt, temperature=temperature)
+
+    async def agenerate(self, prompt: str, *, temperature: Optional[float] = None) -> str:
+        return await self._next().agenerate(prompt, temperature=temperature)
+
+    def stream_generate(self, prompt: str, *, temperature: Optional[float] = None) -> Iterator[str]:
+        return self._next().stream_generate(prompt, temperature=temperature)
+
+    def batch_generate(self, prompts: List[str], *, temperature: Optional[float] = None) -> List[str]:
+        # A batch job is one provider-side submission; no point splitting it.
+        return self._next().batch_generate(prompts, temperature=temperature)
@@ -2,25 +2,29 @@
 
 from __future__ import annotations
 
+import asyncio
 import json
 import re
 from dataclasses import dataclass
-from typing import Any, Dict
+from typing import Any, Callable, Collection, Dict, List, Optional, Tuple, Union
 
+import orjson
 import pandas as pd
+from pydantic import TypeAdapter
 
 from src.shared.schemas import (
     DatasetInfo,
     PipelineState,
     Step1Output,
     Step2Output,
+    Step12Output,
     Step3Output,
     Step4Output,
     Step5Output,
     Step6Output,
 )
 from src.backend.llm.base_client import BaseLLMClient
-from src.backend.llm.prompt_loader import load_step_prompt
+from src.backend.llm.prompt_loader import load_step_prompt_segments
 
 
 # =========================
@@ -34,15 +38,6 @@ class PromptContext:
     dataset_sample: str
 
 
-class SafeFormatDict(dict):
-    """
-    A dict for str.format_map that leaves {MISSING_KEY} as-is instead of raising KeyError.
-    """
-
-    def __missing__(self, key: str) -> str:
-        return "{" + key + "}"
-
-
 def build_dataset_schema_str(dataset_info: DatasetInfo) -> str:
     """
     Convert DatasetInfo into a human-readable schema string used in prompts.
@@ -70,15 +65,34 @@ def build_dataset_schema_str(dataset_info: DatasetInfo) -> str:
     return "\n".join(lines)
 
 
+# Caps for the prompt sample: wide frames get truncated column-wise and long
+# cell values clipped, bounding both render cost and prompt tokens.
+_SAMPLE_MAX_COLS = 20
+_SAMPLE_MAX_CELL_CHARS = 32
+
+
 def build_dataset_sample_str(df: pd.DataFrame, max_rows: int = 3) -> str:
     """
-    A small sample of the data as plain text.
+    A small sample of the data as plain tab-separated text.
 
-    TODO[pipeline]:
-      - If needed, truncate very wide tables more aggressively.
+    Column-oriented assembly over the head's numpy arrays; pandas' to_string
+    runs a full-frame formatter that measures widths across every column,
+    which dominates prompt-assembly time for wide frames. Tab-separated
+    output is also shorter for the LLM than aligned columns.
     """
     head = df.head(max_rows)
-    return head.to_string(index=False)
+    cols = [str(c) for c in head.columns[:_SAMPLE_MAX_COLS]]
+    arrays = [head[c].to_numpy() for c in head.columns[:_SAMPLE_MAX_COLS]]
+
+    lines = ["\t".join(cols)]
+    for i in range(len(head)):
+        lines.append(
+            "\t".join(str(a[i])[:_SAMPLE_MAX_CELL_CHARS] for a in arrays)
+        )
+    return "\n".join(lines)
+
+
+_FENCE_RE = re.compile(r"^```(?:json)?\s*(.*?)\s*```$", flags=re.DOTALL | re.IGNORECASE)
 
 
 def _strip_code_fences(raw: str) -> str:
@@ -86,8 +100,7 @@ def _strip_code_fences(raw: str) -> str:
     Remove wrapping ``` ``` or ```json ``` fences if present.
     """
     text = raw.strip()
-    pattern = re.compile(r"^```(?:json)?\s*(.*?)\s*```$", flags=re.DOTALL | re.IGNORECASE)
-    match = pattern.match(text)
+    match = _FENCE_RE.match(text)
     if match:
         return match.group(1).strip()
     return text
@@ -96,33 +109,47 @@ def _strip_code_fences(raw: str) -> str:
 def _extract_json_payload(raw: str) -> str:
     """
     Strip fences and trim any text before/after the first JSON object/array.
+
+    Uses str.find/rfind (C-level) rather than a per-character Python loop;
+    LLM outputs can be several KB and this sits on every step's parse path.
     """
     text = _strip_code_fences(raw)
 
     # Trim leading text until first { or [
-    start_idx = None
-    for idx, ch in enumerate(text):
-        if ch in "{[":
-            start_idx = idx
-            break
-    if start_idx is not None:
-        text = text[start_idx:]
+    obj_start, arr_start = text.find("{"), text.find("[")
+    candidates = [idx for idx in (obj_start, arr_start) if idx != -1]
+    if candidates:
+        text = text[min(candidates) :]
 
     # Trim trailing text after last } or ]
-    end_idx = None
-    for idx in range(len(text) - 1, -1, -1):
-        if text[idx] in "}]":
-            end_idx = idx + 1
-            break
-    if end_idx is not None:
-        text = text[:end_idx]
+    end_idx = max(text.rfind("}"), text.rfind("]"))
+    if end_idx != -1:
+        text = text[: end_idx + 1]
 
     return text.strip()
 
 
-def _parse_json_to_model(raw: str, model_cls):
+# One TypeAdapter per step-output model, built lazily and reused; repeated
+# model_validate calls re-resolve the core schema, validate_python on a
+# cached adapter does not.
+_ADAPTERS: Dict[type, TypeAdapter] = {}
+
+
+def _get_adapter(model_cls: type) -> TypeAdapter:
+    adapter = _ADAPTERS.get(model_cls)
+    if adapter is None:
+        adapter = TypeAdapter(model_cls)
+        _ADAPTERS[model_cls] = adapter
+    return adapter
+
+
+def _parse_json_to_model(raw: str, model_cls, *, strict: bool = True):
     """
     Parse LLM output as JSON into a Pydantic model and surface friendlier errors.
+
+    strict=False additionally tries model_construct first, skipping field
+    validation entirely — only appropriate for retries of payloads that have
+    already validated once; LLM output should always go through strict=True.
     """
     if raw is None or not raw.strip():
         raise ValueError(f"{model_cls.__name__}: empty response from LLM.")
@@ -132,7 +159,9 @@ def _parse_json_to_model(raw: str, model_cls):
         raise ValueError(f"{model_cls.__name__}: no JSON object found in response.")
 
     try:
-        data = json.loads(cleaned)
+        # orjson decodes 2-5x faster than stdlib json; its JSONDecodeError
+        # subclasses json.JSONDecodeError, so the error handling is unchanged.
+        data = orjson.loads(cleaned)
     except json.JSONDecodeError as exc:
         snippet = cleaned.strip()
         if len(snippet) > 500:
@@ -142,18 +171,43 @@ def _parse_json_to_model(raw: str, model_cls):
             f"Raw output snippet: {snippet}"
         ) from exc
 
-    return model_cls.model_validate(data)
+    if not strict and isinstance(data, dict):
+        try:
+            return model_cls.model_construct(**data)
+        except (AttributeError, TypeError):
+            pass  # fall through to full validation
 
+    return _get_adapter(model_cls).validate_python(data)
 
-def _build_common_context(state: PipelineState, ctx: PromptContext) -> Dict[str, Any]:
+
+# Prompt-size budget for free-text fields re-sent to later steps. Each step's
+# output is embedded verbatim in every later prompt, so unbounded reasoning
+# text inflates steps 2-6 linearly; downstream steps key off the structured
+# fields, not the prose. ~600 chars ≈ 150 tokens, generous for a rationale.
+_PROMPT_TEXT_MAX_CHARS = 600
+_PROMPT_TRIMMED_FIELDS = ("reasoning", "justification")
+
+
+def _trim_prompt_text_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Clip long free-text fields before embedding a step output in a prompt."""
+    for key in _PROMPT_TRIMMED_FIELDS:
+        value = data.get(key)
+        if isinstance(value, str) and len(value) > _PROMPT_TEXT_MAX_CHARS:
+            data[key] = value[: _PROMPT_TEXT_MAX_CHARS] + "…"
+    return data
+
+
+def _dump_model_json(model: Any) -> str:
     """
-    Common placeholders shared by most steps.
+    Prompt-ready pretty JSON for a step output.
+
+    orjson encodes several times faster than pydantic's model_dump_json with
+    indent, and the pipeline serializes step outputs on every step boundary.
+    Free-text fields are budget-trimmed; the full text stays on the state.
     """
-    return {
-        "USER_QUERY": state.user_query,
-        "DATASET_SCHEMA": ctx.dataset_schema,
-        "DATASET_SAMPLE": ctx.dataset_sample,
-    }
+    return orjson.dumps(
+        _trim_prompt_text_fields(model.model_dump()), option=orjson.OPT_INDENT_2
+    ).decode()
 
 
 def _get_output_format(step: str) -> str:
@@ -167,8 +221,13 @@ def _get_output_format(step: str) -> str:
         raise ValueError(f"No output format registered for {step}") from exc
 
 
+def _pretty_json(obj: Any) -> str:
+    """orjson-backed 2-space pretty printer for the static format examples."""
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
+
 STEP_OUTPUT_FORMATS: Dict[str, str] = {
-    "step1": json.dumps(
+    "step1": _pretty_json(
         {
             "selected_columns": ["column_a", "column_b"],
             "column_roles": {
@@ -177,33 +236,29 @@ STEP_OUTPUT_FORMATS: Dict[str, str] = {
             },
             "reasoning": "Explain why each column matters.",
         },
-        indent=2,
     ),
-    "step2": json.dumps(
+    "step2": _pretty_json(
         {
             "intent": "trend",
             "target_columns": ["date", "value"],
             "reasoning": "Explain how the intent was determined.",
         },
-        indent=2,
     ),
-    "step3": json.dumps(
+    "step3": _pretty_json(
         {
             "aggregations": [{"column": "Rating", "operation": "mean"}],
             "filters": [{"column": "Year", "operator": ">=", "value": 2000}],
             "group_by": ["Genre"],
             "reasoning": "Explain filters/aggregations.",
         },
-        indent=2,
     ),
-    "step4": json.dumps(
+    "step4": _pretty_json(
         {
             "mark_type": "bar",
             "justification": "Explain why this mark suits the intent.",
         },
-        indent=2,
     ),
-    "step5": json.dumps(
+    "step5": _pretty_json(
         {
             "encodings": {
                 "x": {"field": "Genre", "type": "nominal"},
@@ -224,9 +279,8 @@ STEP_OUTPUT_FORMATS: Dict[str, str] = {
             },
             "reasoning": "Explain encoding assignments.",
         },
-        indent=2,
     ),
-    "step6": json.dumps(
+    "step6": _pretty_json(
         {
             "vl_spec_draft": {
                 "$schema": "https://vega.github.io/schema/vega-lite/v5.json",
@@ -236,7 +290,23 @@ STEP_OUTPUT_FORMATS: Dict[str, str] = {
             },
             "warnings": [],
         },
-        indent=2,
+    ),
+    "step12": _pretty_json(
+        {
+            "step1": {
+                "selected_columns": ["column_a", "column_b"],
+                "column_roles": {
+                    "column_a": "categorical",
+                    "column_b": "quantitative",
+                },
+                "reasoning": "Explain why each column matters.",
+            },
+            "step2": {
+                "intent": "trend",
+                "target_columns": ["column_a", "column_b"],
+                "reasoning": "Explain how the intent was determined.",
+            },
+        },
     ),
 }
 
@@ -245,209 +315,509 @@ STEP_OUTPUT_FORMATS: Dict[str, str] = {
 # Step functions
 # =========================
 
+# Ordered mapping: step name -> expected output model.
+# Iteration order doubles as pipeline order, so a step's prompt context
+# automatically includes the outputs of every step before it.
+_STEP_MODELS: Dict[str, Any] = {
+    "step1": Step1Output,
+    "step2": Step2Output,
+    "step3": Step3Output,
+    "step4": Step4Output,
+    "step5": Step5Output,
+    "step6": Step6Output,
+}
+
 
-def run_step1(
+def _step_output_json(state: PipelineState, step: str) -> str:
+    """
+    Prompt-ready JSON for a completed step, memoized on the state.
+
+    Without the cache, step1's output gets re-serialized by every later step
+    (5x), step2's 4x, and so on — model_dump_json walks the model each call.
+    """
+    result = getattr(state, step)
+    if result is None:
+        return ""
+    cached = state._step_json.get(step)
+    if cached is None:
+        cached = _dump_model_json(result)
+        state._step_json[step] = cached
+    return cached
+
+
+# Skeleton parts: resolved text as plain str, a still-pending placeholder as
+# a 1-tuple of its field name.
+PromptSkeleton = List[Union[str, Tuple[str]]]
+
+
+def _resolve_placeholder(
+    field_name: str, step: str, state: PipelineState, ctx: PromptContext
+) -> str:
+    """
+    Resolve one template placeholder to its text.
+
+    Unknown placeholders (and step outputs not yet produced) are left as-is,
+    matching str.format_map-with-__missing__ semantics without a dict
+    subclass — and only the fields a template actually references get
+    computed at all.
+    """
+    if field_name == "USER_QUERY":
+        return state.user_query
+    if field_name == "DATASET_SCHEMA":
+        return ctx.dataset_schema
+    if field_name == "DATASET_SAMPLE":
+        return ctx.dataset_sample
+    if field_name == "OUTPUT_FORMAT":
+        return _get_output_format(step)
+    if field_name.endswith("_OUTPUT"):
+        prev_step = field_name[: -len("_OUTPUT")].lower()
+        if prev_step in _STEP_MODELS:
+            step_json = _step_output_json(state, prev_step)
+            if step_json:
+                return step_json
+    return "{" + field_name + "}"
+
+
+def build_prompt_skeleton(
+    step: str,
     state: PipelineState,
-    df: pd.DataFrame,
-    llm_client: BaseLLMClient,
-) -> PipelineState:
+    ctx: PromptContext,
+    *,
+    pending: Collection[str] = (),
+) -> PromptSkeleton:
     """
-    Step 1 — Column Understanding & Selection.
+    Partially render a step prompt from its pre-parsed segments.
+
+    Every placeholder except those listed in `pending` is resolved
+    immediately; pending ones (e.g., the in-flight previous step's output)
+    are left as markers for finalize_prompt. This lets the async driver
+    pre-build step N+1's prompt while step N's LLM call is on the wire.
+    """
+    parts: PromptSkeleton = []
+    for literal, field_name in load_step_prompt_segments(step):
+        if literal:
+            parts.append(literal)
+        if field_name is not None:
+            if field_name in pending:
+                parts.append((field_name,))
+            else:
+                parts.append(_resolve_placeholder(field_name, step, state, ctx))
+    return parts
+
+
+def finalize_prompt(skeleton: PromptSkeleton, values: Dict[str, str]) -> str:
+    """
+    Fill a skeleton's pending placeholders and join it into the final prompt.
+    """
+    return "".join(
+        part if isinstance(part, str) else values.get(part[0], "{" + part[0] + "}")
+        for part in skeleton
+    )
+
+
+def _build_step_prompt(step: str, state: PipelineState, ctx: PromptContext) -> str:
+    """
+    Render the full prompt for a step.
+
+    Completed prior-step outputs are exposed as {STEPk_OUTPUT}; templates
+    only reference the ones they need, and _resolve_placeholder leaves any
+    unknown or not-yet-produced placeholders as {NAME} literals.
     """
-    ctx = PromptContext(
+    return finalize_prompt(build_prompt_skeleton(step, state, ctx), {})
+
+
+def build_prompt_context(state: PipelineState, df: pd.DataFrame) -> PromptContext:
+    """
+    Build the (deterministic) schema/sample strings shared by every step.
+
+    Callers should build this once per pipeline run and pass it to each
+    run_stepN — rebuilding it per step repeats the df.head() rendering and
+    schema string assembly six times for identical output.
+    """
+    return PromptContext(
         dataset_schema=build_dataset_schema_str(state.dataset_info),
         dataset_sample=build_dataset_sample_str(df),
     )
 
-    template = load_step_prompt("step1")
 
-    context = _build_common_context(state, ctx)
-    context["OUTPUT_FORMAT"] = _get_output_format("step1")
-
-    prompt = template.format_map(SafeFormatDict(context))
+def _execute_step(
+    step: str,
+    state: PipelineState,
+    ctx: PromptContext,
+    llm_client: BaseLLMClient,
+) -> PipelineState:
+    """
+    Shared synchronous driver: build prompt -> call LLM -> parse -> store.
+    """
+    prompt = _build_step_prompt(step, state, ctx)
 
-    raw = llm_client.generate(prompt)
-    result = _parse_json_to_model(raw, Step1Output)
+    raw = llm_client.generate_cached(prompt)
+    result = _parse_json_to_model(raw, _STEP_MODELS[step])
 
-    state.step1 = result
+    setattr(state, step, result)
+    state._step_json[step] = _dump_model_json(result)
     return state
 
 
-def run_step2(
+async def arun_step(
+    step: str,
     state: PipelineState,
-    df: pd.DataFrame,
+    ctx: PromptContext,
     llm_client: BaseLLMClient,
 ) -> PipelineState:
     """
-    Step 2 — Analytical Intent Classification.
+    Async driver for a single step, using BaseLLMClient.agenerate.
+
+    Independent invocations (e.g., the same step across a batch of queries)
+    can be awaited concurrently with asyncio.gather.
     """
-    ctx = PromptContext(
-        dataset_schema=build_dataset_schema_str(state.dataset_info),
-        dataset_sample=build_dataset_sample_str(df),
-    )
+    prompt = _build_step_prompt(step, state, ctx)
 
-    template = load_step_prompt("step2")
+    raw = await llm_client.agenerate_cached(prompt)
+    result = _parse_json_to_model(raw, _STEP_MODELS[step])
 
-    context = _build_common_context(state, ctx)
-    context["STEP1_OUTPUT"] = (
-        state.step1.model_dump_json(indent=2) if state.step1 is not None else ""
-    )
-    context["OUTPUT_FORMAT"] = _get_output_format("step2")
+    setattr(state, step, result)
+    state._step_json[step] = _dump_model_json(result)
+    return state
 
-    prompt = template.format_map(SafeFormatDict(context))
 
-    raw = llm_client.generate(prompt)
-    result = _parse_json_to_model(raw, Step2Output)
+# Mark-type guess per analytical intent, used to speculate step5 before
+# step4 has answered. Mirrors the dominant choice the model makes for each
+# intent; a wrong guess only costs one discarded LLM call.
+_INTENT_MARK_GUESS: Dict[str, str] = {
+    "compare": "bar",
+    "trend": "line",
+    "distribution": "bar",
+    "correlation": "point",
+    "rank": "bar",
+}
 
-    state.step2 = result
-    return state
 
+def _guess_mark_type(state: PipelineState) -> str:
+    """Cheap heuristic for step4's most likely mark_type."""
+    intent = state.step2.intent if state.step2 is not None else None
+    return _INTENT_MARK_GUESS.get(intent, "bar")
 
-def run_step3(
+
+def _speculative_step4_json(mark_type: str) -> str:
+    """
+    A plausible stand-in for {STEP4_OUTPUT} in a speculative step5 prompt.
+    """
+    return _dump_model_json(
+        Step4Output(
+            mark_type=mark_type,
+            justification=f"A {mark_type} mark suits the detected analytical intent.",
+        )
+    )
+
+
+# Stand-in for {STEP3_OUTPUT} in step4's prompt when steps 3 and 4 run
+# concurrently; the mark recommendation keys off intent and column roles, so
+# the prompt tells the model the transformation plan simply isn't there.
+_STEP3_OMITTED_NOTE = (
+    '{"note": "Aggregation planning runs in parallel with this step; '
+    'base the mark recommendation on the Step 1 and Step 2 outputs."}'
+)
+
+
+async def _arun_steps_3_and_4(
     state: PipelineState,
-    df: pd.DataFrame,
+    ctx: PromptContext,
     llm_client: BaseLLMClient,
 ) -> PipelineState:
     """
-    Step 3 — Aggregation & Transformation.
-    """
-    ctx = PromptContext(
-        dataset_schema=build_dataset_schema_str(state.dataset_info),
-        dataset_sample=build_dataset_sample_str(df),
-    )
+    Run steps 3 and 4 concurrently with asyncio.gather.
 
-    template = load_step_prompt("step3")
+    Step4's template normally embeds step3's output; in this mode it gets a
+    placeholder note instead, trading that context for overlapping the two
+    network-bound calls (wall clock ~max instead of sum of the two).
+    """
+    prompt3 = _build_step_prompt("step3", state, ctx)
+    skeleton4 = build_prompt_skeleton("step4", state, ctx, pending=("STEP3_OUTPUT",))
+    prompt4 = finalize_prompt(skeleton4, {"STEP3_OUTPUT": _STEP3_OMITTED_NOTE})
 
-    context = _build_common_context(state, ctx)
-    context["STEP1_OUTPUT"] = (
-        state.step1.model_dump_json(indent=2) if state.step1 is not None else ""
-    )
-    context["STEP2_OUTPUT"] = (
-        state.step2.model_dump_json(indent=2) if state.step2 is not None else ""
+    raw3, raw4 = await asyncio.gather(
+        llm_client.agenerate_cached(prompt3),
+        llm_client.agenerate_cached(prompt4),
     )
-    context["OUTPUT_FORMAT"] = _get_output_format("step3")
 
-    prompt = template.format_map(SafeFormatDict(context))
+    for step, raw in (("step3", raw3), ("step4", raw4)):
+        result = _parse_json_to_model(raw, _STEP_MODELS[step])
+        setattr(state, step, result)
+        state._step_json[step] = _dump_model_json(result)
+    return state
+
 
-    raw = llm_client.generate(prompt)
-    result = _parse_json_to_model(raw, Step3Output)
+async def arun_all_steps(
+    state: PipelineState,
+    ctx: PromptContext,
+    llm_client: BaseLLMClient,
+    *,
+    speculate_step5: bool = False,
+    overlap_step34: bool = False,
+) -> PipelineState:
+    """
+    Run steps 1→6 asynchronously with prompt prefetching.
+
+    While step N's LLM call is in flight, step N+1's prompt skeleton
+    (schema, sample, output format, earlier step outputs) is pre-built on
+    the event-loop thread; once step N resolves, only its output placeholder
+    remains to fill. Overlaps CPU-bound prompt assembly with network I/O.
+
+    With speculate_step5=True, step5 is additionally launched while step4 is
+    still in flight, using a heuristic mark_type guess in place of the real
+    step4 output. If step4's mark_type matches the guess, the in-flight step5
+    call is kept (its prompt differed only in step4's justification text,
+    which step5 does not depend on); otherwise it is cancelled and step5 is
+    re-issued normally. Trades one possibly-wasted LLM call for hiding
+    step5's latency behind step4's.
+
+    With overlap_step34=True, steps 3 and 4 are gathered concurrently after
+    step2, with step4's prompt noting that the transformation plan is not
+    available; this mode takes a simpler path without the step5 speculation.
+    """
+    if overlap_step34:
+        state = await arun_step("step1", state, ctx, llm_client)
+        state = await arun_step("step2", state, ctx, llm_client)
+        state = await _arun_steps_3_and_4(state, ctx, llm_client)
+        state = await arun_step("step5", state, ctx, llm_client)
+        return await arun_step("step6", state, ctx, llm_client)
+
+    order = tuple(_STEP_MODELS)
+
+    skeleton = build_prompt_skeleton(order[0], state, ctx)
+    pending_fill: Dict[str, str] = {}
+
+    spec_task: Optional[asyncio.Task] = None
+    spec_mark: Optional[str] = None
+
+    for i, step in enumerate(order):
+        if step == "step5" and spec_task is not None:
+            if state.step4 is not None and state.step4.mark_type == spec_mark:
+                task = spec_task
+            else:
+                spec_task.cancel()
+                task = asyncio.create_task(
+                    llm_client.agenerate_cached(finalize_prompt(skeleton, pending_fill))
+                )
+        else:
+            task = asyncio.create_task(
+                llm_client.agenerate_cached(finalize_prompt(skeleton, pending_fill))
+            )
+        # Yield once so the request actually goes out before we spend CPU
+        # time on the next skeleton.
+        await asyncio.sleep(0)
+
+        next_skeleton: PromptSkeleton = []
+        if i + 1 < len(order):
+            next_skeleton = build_prompt_skeleton(
+                order[i + 1], state, ctx, pending=(f"{step.upper()}_OUTPUT",)
+            )
+
+        if speculate_step5 and step == "step4":
+            spec_mark = _guess_mark_type(state)
+            spec_prompt = finalize_prompt(
+                next_skeleton, {"STEP4_OUTPUT": _speculative_step4_json(spec_mark)}
+            )
+            spec_task = asyncio.create_task(llm_client.agenerate_cached(spec_prompt))
+            await asyncio.sleep(0)
+
+        raw = await task
+        result = _parse_json_to_model(raw, _STEP_MODELS[step])
+
+        setattr(state, step, result)
+        step_json = _dump_model_json(result)
+        state._step_json[step] = step_json
+
+        skeleton = next_skeleton
+        pending_fill = {f"{step.upper()}_OUTPUT": step_json}
 
-    state.step3 = result
     return state
 
 
-def run_step4(
+class _JsonRootTracker:
+    """
+    Incrementally track whether the root JSON object/array has closed.
+
+    Fed streamed chunks, it counts brace/bracket depth while skipping string
+    contents and escapes. Lets the streaming consumer stop reading as soon as
+    the payload is complete instead of draining trailing tokens.
+    """
+
+    def __init__(self) -> None:
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, chunk: str) -> bool:
+        """Consume a chunk; return True once the root value has closed."""
+        for ch in chunk:
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+            if ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+                self._started = True
+            elif ch in "}]":
+                self._depth -= 1
+                if self._started and self._depth <= 0:
+                    return True
+        return False
+
+
+def run_step_stream(
+    step: str,
     state: PipelineState,
-    df: pd.DataFrame,
+    ctx: PromptContext,
     llm_client: BaseLLMClient,
+    on_chunk: Optional[Callable[[str], None]] = None,
 ) -> PipelineState:
     """
-    Step 4 — Visualization Type Recommendation.
+    Streaming variant of a step: consume stream_generate chunk by chunk.
+
+    `on_chunk` (e.g., a Streamlit placeholder update) sees partial text at
+    first-token latency, and reading stops as soon as the root JSON closes,
+    so the user-perceived wait for big Step 6 specs shrinks to roughly
+    first-token latency plus generation of the payload itself.
     """
-    ctx = PromptContext(
-        dataset_schema=build_dataset_schema_str(state.dataset_info),
-        dataset_sample=build_dataset_sample_str(df),
-    )
+    prompt = _build_step_prompt(step, state, ctx)
+
+    tracker = _JsonRootTracker()
+    chunks: List[str] = []
+    for chunk in llm_client.stream_generate(prompt):
+        chunks.append(chunk)
+        if on_chunk is not None:
+            on_chunk(chunk)
+        if tracker.feed(chunk):
+            break
 
-    template = load_step_prompt("step4")
+    raw = "".join(chunks)
+    result = _parse_json_to_model(raw, _STEP_MODELS[step])
 
-    context = _build_common_context(state, ctx)
-    context["STEP1_OUTPUT"] = (
-        state.step1.model_dump_json(indent=2) if state.step1 is not None else ""
-    )
-    context["STEP2_OUTPUT"] = (
-        state.step2.model_dump_json(indent=2) if state.step2 is not None else ""
-    )
-    context["STEP3_OUTPUT"] = (
-        state.step3.model_dump_json(indent=2) if state.step3 is not None else ""
-    )
-    context["OUTPUT_FORMAT"] = _get_output_format("step4")
+    setattr(state, step, result)
+    state._step_json[step] = _dump_model_json(result)
+    return state
 
-    prompt = template.format_map(SafeFormatDict(context))
 
-    raw = llm_client.generate(prompt)
-    result = _parse_json_to_model(raw, Step4Output)
+def run_step_batch(
+    step: str,
+    states: List[PipelineState],
+    ctx: PromptContext,
+    llm_client: BaseLLMClient,
+) -> List[PipelineState]:
+    """
+    Run one step for many pipeline states as a single batch_generate call.
 
-    state.step4 = result
-    return state
+    All states must share the same dataset (hence the single PromptContext);
+    they differ by user query and earlier step outputs. Used by
+    run_pipeline_batch to push each step level through the provider's
+    Batch API.
+    """
+    prompts = [_build_step_prompt(step, state, ctx) for state in states]
+    raws = llm_client.batch_generate(prompts)
 
+    for state, raw in zip(states, raws):
+        result = _parse_json_to_model(raw, _STEP_MODELS[step])
+        setattr(state, step, result)
+        state._step_json[step] = _dump_model_json(result)
 
-def run_step5(
+    return states
+
+
+def run_step12(
     state: PipelineState,
-    df: pd.DataFrame,
+    ctx: PromptContext,
     llm_client: BaseLLMClient,
 ) -> PipelineState:
     """
-    Step 5 — Encoding Assignment.
+    Fused Step 1+2 — one LLM call returning both step outputs.
+
+    Same model compute as the two separate calls but one network round-trip;
+    the result is split into state.step1/state.step2 so steps 3-6 can't tell
+    the fused path was taken. Callers should keep the 6-step path as the
+    fallback for models of unknown capability.
     """
-    ctx = PromptContext(
-        dataset_schema=build_dataset_schema_str(state.dataset_info),
-        dataset_sample=build_dataset_sample_str(df),
-    )
+    prompt = _build_step_prompt("step12", state, ctx)
 
-    template = load_step_prompt("step5")
+    raw = llm_client.generate_cached(prompt)
+    fused = _parse_json_to_model(raw, Step12Output)
 
-    context = _build_common_context(state, ctx)
-    context["STEP1_OUTPUT"] = (
-        state.step1.model_dump_json(indent=2) if state.step1 is not None else ""
-    )
-    context["STEP2_OUTPUT"] = (
-        state.step2.model_dump_json(indent=2) if state.step2 is not None else ""
-    )
-    context["STEP3_OUTPUT"] = (
-        state.step3.model_dump_json(indent=2) if state.step3 is not None else ""
-    )
-    context["STEP4_OUTPUT"] = (
-        state.step4.model_dump_json(indent=2) if state.step4 is not None else ""
-    )
-    context["OUTPUT_FORMAT"] = _get_output_format("step5")
+    state.step1 = fused.step1
+    state._step_json["step1"] = _dump_model_json(fused.step1)
+    state.step2 = fused.step2
+    state._step_json["step2"] = _dump_model_json(fused.step2)
+    return state
 
-    prompt = template.format_map(SafeFormatDict(context))
 
-    raw = llm_client.generate(prompt)
-    result = _parse_json_to_model(raw, Step5Output)
+def run_step1(
+    state: PipelineState,
+    ctx: PromptContext,
+    llm_client: BaseLLMClient,
+) -> PipelineState:
+    """
+    Step 1 — Column Understanding & Selection.
+    """
+    return _execute_step("step1", state, ctx, llm_client)
+
 
-    state.step5 = result
-    return state
+def run_step2(
+    state: PipelineState,
+    ctx: PromptContext,
+    llm_client: BaseLLMClient,
+) -> PipelineState:
+    """
+    Step 2 — Analytical Intent Classification.
+    """
+    return _execute_step("step2", state, ctx, llm_client)
 
 
-def run_step6(
+def run_step3(
     state: PipelineState,
-    df: pd.DataFrame,
+    ctx: PromptContext,
     llm_client: BaseLLMClient,
 ) -> PipelineState:
     """
-    Step 6 — Vega-Lite Draft Spec Generation.
+    Step 3 — Aggregation & Transformation.
     """
-    ctx = PromptContext(
-        dataset_schema=build_dataset_schema_str(state.dataset_info),
-        dataset_sample=build_dataset_sample_str(df),
-    )
+    return _execute_step("step3", state, ctx, llm_client)
 
-    template = load_step_prompt("step6")
 
-    context = _build_common_context(state, ctx)
-    context["STEP1_OUTPUT"] = (
-        state.step1.model_dump_json(indent=2) if state.step1 is not None else ""
-    )
-    context["STEP2_OUTPUT"] = (
-        state.step2.model_dump_json(indent=2) if state.step2 is not None else ""
-    )
-    context["STEP3_OUTPUT"] = (
-        state.step3.model_dump_json(indent=2) if state.step3 is not None else ""
-    )
-    context["STEP4_OUTPUT"] = (
-        state.step4.model_dump_json(indent=2) if state.step4 is not None else ""
-    )
-    context["STEP5_OUTPUT"] = (
-        state.step5.model_dump_json(indent=2) if state.step5 is not None else ""
-    )
-    context["OUTPUT_FORMAT"] = _get_output_format("step6")
+def run_step4(
+    state: PipelineState,
+    ctx: PromptContext,
+    llm_client: BaseLLMClient,
+) -> PipelineState:
+    """
+    Step 4 — Visualization Type Recommendation.
+    """
+    return _execute_step("step4", state, ctx, llm_client)
 
-    prompt = template.format_map(SafeFormatDict(context))
 
-    raw = llm_client.generate(prompt)
-    result = _parse_json_to_model(raw, Step6Output)
+def run_step5(
+    state: PipelineState,
+    ctx: PromptContext,
+    llm_client: BaseLLMClient,
+) -> PipelineState:
+    """
+    Step 5 — Encoding Assignment.
+    """
+    return _execute_step("step5", state, ctx, llm_client)
 
-    state.step6 = result
-    return state
+
+def run_step6(
+    state: PipelineState,
+    ctx: PromptContext,
+    llm_client: BaseLLMClient,
+) -> PipelineState:
+    """
+    Step 6 — Vega-Lite Draft Spec Generation.
+    """
+    return _execute_step("step6", state, ctx, llm_client)
@@ -2,7 +2,11 @@
 
 from __future__ import annotations
 
-from typing import Dict, Literal, TypedDict, Optional
+import asyncio
+from functools import lru_cache
+
+import orjson
+from typing import Dict, List, Literal, Sequence, TypedDict, Optional, Union
 
 import pandas as pd
 
@@ -10,7 +14,12 @@ from src.shared.schemas import DatasetField, DatasetInfo, PipelineState
 from src.backend.llm.base_client import BaseLLMClient
 from src.backend.llm.openai_client import OpenAIClient
 from src.backend.llm.groq_client import GroqClient
+from src.backend.llm.round_robin import RoundRobinClient
 from src.backend.pipeline.steps import (
+    arun_all_steps,
+    build_prompt_context,
+    run_step_batch,
+    run_step12,
     run_step1,
     run_step2,
     run_step3,
@@ -27,6 +36,20 @@ Provider = Literal["groq", "openai"]  # openai: TODO
 class PipelineRunResult(TypedDict):
     state: PipelineState
     spec: Optional[Dict]
+    # Pre-serialized spec for consumers that want JSON text (orjson encodes
+    # once here instead of stdlib json per Streamlit rerun).
+    spec_json: Optional[str]
+
+
+def _finish_run(state: PipelineState) -> PipelineRunResult:
+    """Build the final spec, stash it on the state, and package the result."""
+    final_spec = build_spec(state)
+    state.final_spec = final_spec
+    return PipelineRunResult(
+        state=state,
+        spec=final_spec,
+        spec_json=orjson.dumps(final_spec).decode() if final_spec else None,
+    )
 
 
 def _infer_field_type(dtype) -> str:
@@ -41,19 +64,40 @@ def _infer_field_type(dtype) -> str:
     return "categorical"
 
 
+# Example values only need to be representative for prompting; scanning a
+# bounded head is much cheaper than dropna()+unique() over full columns.
+_EXAMPLE_SCAN_ROWS = 256
+
+
 def build_dataset_info(df: pd.DataFrame, name: Optional[str] = None) -> DatasetInfo:
     """
     Construct DatasetInfo from a pandas DataFrame.
+
+    Type inference works off df.dtypes (no data scan); example values come
+    from a bounded head slice so wide/long frames don't pay a full-column
+    unique() per field.
     """
+    dtypes = df.dtypes
+    head = df.head(_EXAMPLE_SCAN_ROWS)
+
     fields = []
     for col in df.columns:
-        inferred = _infer_field_type(df[col].dtype)
-        example_values = df[col].dropna().unique()[:3].tolist()
+        dtype = dtypes[col]
+        inferred = _infer_field_type(dtype)
+        example_values = head[col].dropna().drop_duplicates().head(3).tolist()
 
-        # Detect if this is an integer-valued quantitative field
+        # Detect if this is an integer-valued quantitative field. Float
+        # columns count too when every present value is whole (e.g., a Year
+        # column upcast to float by NaNs) — the check is a single vectorized
+        # modulo over the column, not a Python loop.
         is_integer = None
-        if inferred == "quantitative" and pd.api.types.is_integer_dtype(df[col].dtype):
-            is_integer = True
+        if inferred == "quantitative":
+            if pd.api.types.is_integer_dtype(dtype):
+                is_integer = True
+            elif pd.api.types.is_float_dtype(dtype):
+                values = df[col].dropna()
+                if len(values) and (values % 1 == 0).all():
+                    is_integer = True
 
         fields.append(
             DatasetField(
@@ -72,10 +116,7 @@ def build_dataset_info(df: pd.DataFrame, name: Optional[str] = None) -> DatasetI
     )
 
 
-def make_llm_client(provider: Provider, api_key: str, model_name: str) -> BaseLLMClient:
-    """
-    Factory for LLM clients.
-    """
+def _build_provider_client(provider: Provider, api_key: str, model_name: str) -> BaseLLMClient:
     if provider == "groq":
         return GroqClient(api_key=api_key, model_name=model_name)
     if provider == "openai":
@@ -83,6 +124,41 @@ def make_llm_client(provider: Provider, api_key: str, model_name: str) -> BaseLL
     raise NotImplementedError(f"Provider '{provider}' is not implemented yet.")
 
 
+@lru_cache(maxsize=8)
+def _make_llm_client_cached(
+    provider: Provider, api_keys: tuple, model_name: str
+) -> BaseLLMClient:
+    clients = [_build_provider_client(provider, key, model_name) for key in api_keys]
+    if len(clients) == 1:
+        return clients[0]
+    return RoundRobinClient(clients)
+
+
+def make_llm_client(
+    provider: Provider,
+    api_key: Union[str, Sequence[str]],
+    model_name: str,
+) -> BaseLLMClient:
+    """
+    Factory for LLM clients.
+
+    Cached so repeated run_pipeline calls (e.g., Streamlit reruns) reuse the
+    same client instance — and its pooled keep-alive connections — instead of
+    opening fresh sockets each invocation.
+
+    api_key may be a single key, a comma-separated list of keys, or a
+    sequence of keys; multiple keys are wrapped in a RoundRobinClient so
+    concurrent batch runs fan out past a single key's rate limit.
+    """
+    if isinstance(api_key, str):
+        keys = tuple(key.strip() for key in api_key.split(",") if key.strip())
+    else:
+        keys = tuple(api_key)
+    if not keys:
+        raise ValueError("make_llm_client requires at least one API key.")
+    return _make_llm_client_cached(provider, keys, model_name)
+
+
 def run_pipeline(
     df: pd.DataFrame,
     user_query: str,
@@ -91,30 +167,190 @@ def run_pipeline(
     model_name: str,
     api_key: str,
     dataset_name: Optional[str] = None,
+    fuse_steps: bool = False,
 ) -> PipelineRunResult:
     """
     Run the full 6-step Prompt-to-Vis pipeline and return both state and final spec.
 
     Minimal version: always runs steps 1→6 in sequence.
+
+    With fuse_steps=True, steps 1 and 2 are issued as one fused LLM call
+    (same compute, one fewer round-trip) — only use this with models known
+    to handle multi-section JSON output reliably (e.g., Llama 3.3 70B,
+    gpt-4o); the default 6-call path is the safe fallback.
     """
     dataset_info = build_dataset_info(df, name=dataset_name)
     state = PipelineState(dataset_info=dataset_info, user_query=user_query)
 
     llm_client = make_llm_client(provider=provider, api_key=api_key, model_name=model_name)
 
+    # Schema/sample strings are deterministic per (dataset_info, df);
+    # build them once instead of once per step.
+    ctx = build_prompt_context(state, df)
+
     # Sequential execution; no LangChain/LangGraph yet.
     # TODO[pipeline]:
     #   - When we add JSON-editable step panels in the UI,
     #     refactor this sequential execution into a LangGraph / LangChain workflow
     #     so that we can re-run the pipeline starting from an arbitrary step (e.g., from step 3).
-    state = run_step1(state, df, llm_client)
-    state = run_step2(state, df, llm_client)
-    state = run_step3(state, df, llm_client)
-    state = run_step4(state, df, llm_client)
-    state = run_step5(state, df, llm_client)
-    state = run_step6(state, df, llm_client)
+    if fuse_steps:
+        state = run_step12(state, ctx, llm_client)
+    else:
+        state = run_step1(state, ctx, llm_client)
+        state = run_step2(state, ctx, llm_client)
+    state = run_step3(state, ctx, llm_client)
+    state = run_step4(state, ctx, llm_client)
+    state = run_step5(state, ctx, llm_client)
+    state = run_step6(state, ctx, llm_client)
 
-    final_spec = build_spec(state)
-    state.final_spec = final_spec
+    return _finish_run(state)
+
+
+async def _arun_pipeline_with_client(
+    df: pd.DataFrame,
+    user_query: str,
+    llm_client: BaseLLMClient,
+    dataset_name: Optional[str] = None,
+    speculate_step5: bool = False,
+    overlap_step34: bool = False,
+) -> PipelineRunResult:
+    """
+    Async pipeline body, reusing one LLM client across all steps.
+
+    Steps 1→6 each depend on the previous step's output, so they are awaited
+    in order; concurrency comes from running multiple *queries* at once
+    (see arun_batch).
+    """
+    dataset_info = build_dataset_info(df, name=dataset_name)
+    state = PipelineState(dataset_info=dataset_info, user_query=user_query)
+
+    ctx = build_prompt_context(state, df)
+
+    # arun_all_steps prefetches each next prompt while the current LLM call
+    # is in flight (and optionally speculates step5 behind step4).
+    state = await arun_all_steps(
+        state,
+        ctx,
+        llm_client,
+        speculate_step5=speculate_step5,
+        overlap_step34=overlap_step34,
+    )
+
+    return _finish_run(state)
+
+
+async def arun_pipeline(
+    df: pd.DataFrame,
+    user_query: str,
+    *,
+    provider: Provider,
+    model_name: str,
+    api_key: str,
+    dataset_name: Optional[str] = None,
+    speculate_step5: bool = False,
+    overlap_step34: bool = False,
+) -> PipelineRunResult:
+    """
+    Async counterpart of run_pipeline, built on BaseLLMClient.agenerate.
+
+    speculate_step5=True additionally overlaps step5 with step4 via a
+    heuristic mark_type guess (see arun_all_steps); at most one extra LLM
+    call is spent when the guess is wrong. overlap_step34=True gathers
+    steps 3 and 4 concurrently, with step4's prompt noting that the
+    transformation plan is unavailable.
+    """
+    llm_client = make_llm_client(provider=provider, api_key=api_key, model_name=model_name)
+    return await _arun_pipeline_with_client(
+        df,
+        user_query,
+        llm_client,
+        dataset_name,
+        speculate_step5=speculate_step5,
+        overlap_step34=overlap_step34,
+    )
+
+
+async def arun_batch(
+    df: pd.DataFrame,
+    user_queries: List[str],
+    *,
+    provider: Provider,
+    model_name: str,
+    api_key: str,
+    dataset_name: Optional[str] = None,
+) -> List[PipelineRunResult]:
+    """
+    Run the pipeline for several user queries concurrently.
+
+    The per-query pipelines are independent, so their LLM calls are fired
+    with asyncio.gather and overlap network + remote compute.
+    """
+    llm_client = make_llm_client(provider=provider, api_key=api_key, model_name=model_name)
+    return list(
+        await asyncio.gather(
+            *(
+                _arun_pipeline_with_client(df, query, llm_client, dataset_name)
+                for query in user_queries
+            )
+        )
+    )
+
+
+def run_pipeline_batch(
+    df: pd.DataFrame,
+    user_queries: List[str],
+    *,
+    provider: Provider,
+    model_name: str,
+    api_key: str,
+    dataset_name: Optional[str] = None,
+) -> List[PipelineRunResult]:
+    """
+    Offline batch mode: run the pipeline for many queries via the provider's
+    Batch API.
+
+    Each step level (step1 for all queries, then step2 for all queries, …)
+    is submitted as one batch job, so N queries cost 6 batch round-trips
+    instead of 6*N interactive calls. Intended for evaluation/regression
+    sweeps where per-query latency is irrelevant.
+    """
+    dataset_info = build_dataset_info(df, name=dataset_name)
+    states = [
+        PipelineState(dataset_info=dataset_info, user_query=query)
+        for query in user_queries
+    ]
+    if not states:
+        return []
+
+    llm_client = make_llm_client(provider=provider, api_key=api_key, model_name=model_name)
+    ctx = build_prompt_context(states[0], df)
+
+    for step in ("step1", "step2", "step3", "step4", "step5", "step6"):
+        states = run_step_batch(step, states, ctx, llm_client)
 
-    return PipelineRunResult(state=state, spec=final_spec)
+    return [_finish_run(state) for state in states]
+
+
+def run_batch(
+    df: pd.DataFrame,
+    user_queries: List[str],
+    *,
+    provider: Provider,
+    model_name: str,
+    api_key: str,
+    dataset_name: Optional[str] = None,
+) -> List[PipelineRunResult]:
+    """
+    Synchronous convenience wrapper around arun_batch for callers
+    (e.g., evaluation scripts) that are not already inside an event loop.
+    """
+    return asyncio.run(
+        arun_batch(
+            df,
+            user_queries,
+            provider=provider,
+            model_name=model_name,
+            api_key=api_key,
+            dataset_name=dataset_name,
+        )
+    )
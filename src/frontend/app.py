@@ -16,13 +16,13 @@ for p in (ROOT_DIR, SRC_DIR):
         sys.path.insert(0, str(p))
 # ----------------------------------------------
 
+import io
 import os
 
 import pandas as pd
 import streamlit as st
 from dotenv import load_dotenv
 
-from src.backend.pipeline.workflow import run_pipeline
 from src.shared.schemas import PipelineState
 
 load_dotenv()
@@ -31,6 +31,93 @@ st.set_page_config(page_title="Project Baseline", page_icon="📊", layout="wide
 
 st.title("📊 Project Baseline - Prompt-to-Vis Agent")
 
+# =========================
+# Cached helpers
+# =========================
+
+
+@st.cache_data(
+    show_spinner=False,
+    max_entries=32,
+    hash_funcs={
+        # Hash frame contents instead of pickling the whole object per lookup.
+        pd.DataFrame: lambda d: pd.util.hash_pandas_object(d, index=True).values.tobytes(),
+    },
+)
+def _run_pipeline_cached(
+    df: pd.DataFrame,
+    user_query: str,
+    provider: str,
+    model_name: str,
+    api_key: str,
+    dataset_name: str,
+):
+    """
+    run_pipeline, memoized across Streamlit reruns.
+
+    Re-running the same query on the same dataset/model is a cache hit
+    instead of six fresh LLM round-trips. (The LLM client itself is already
+    a per-(provider, key, model) singleton inside make_llm_client.)
+
+    The workflow import is deferred to first use: it pulls in the Groq and
+    OpenAI SDKs plus httpx, which the sidebar-only cold start doesn't need.
+    """
+    from src.backend.pipeline.workflow import run_pipeline
+
+    return run_pipeline(
+        df=df,
+        user_query=user_query,
+        provider=provider,
+        model_name=model_name,
+        api_key=api_key,
+        dataset_name=dataset_name,
+    )
+
+
+@st.cache_data(show_spinner=False)
+def _load_csv_bytes(data: bytes) -> pd.DataFrame:
+    """
+    Parse uploaded CSV bytes, memoized across reruns.
+
+    Streamlit re-executes the whole script per widget interaction; without
+    this, an attached upload is re-parsed on every rerun.
+    """
+    return pd.read_csv(io.BytesIO(data))
+
+
+@st.cache_data(show_spinner=False)
+def _load_sample_csv(path: str) -> pd.DataFrame:
+    """Parse the bundled sample CSV once per session."""
+    return pd.read_csv(path)
+
+
+# Static UI vocabularies, hoisted to module scope so reruns don't rebuild
+# the dicts, reverse map, and label lists per interaction. (The sample-prompt
+# buttons stay plain st.button: st.form only batches input widgets around a
+# single submit button, so individual autofill buttons can't live in one.)
+
+PROVIDER_LABEL_TO_VALUE = {
+    "Groq": "groq",
+    "OpenAI": "openai",
+}
+PROVIDER_VALUE_TO_LABEL = {v: k for k, v in PROVIDER_LABEL_TO_VALUE.items()}
+_PROVIDER_LABELS = tuple(PROVIDER_LABEL_TO_VALUE)
+_PROVIDER_INDEX = {label: i for i, label in enumerate(_PROVIDER_LABELS)}
+
+GROQ_MODEL_OPTIONS = {
+    "Llama 3.3 70B (Groq, Recommended)": "llama-3.3-70b-versatile",
+    "Llama 3.1 8B (Groq, Fast)": "llama-3.1-8b-instant",
+}
+_GROQ_MODEL_LABELS = tuple(GROQ_MODEL_OPTIONS)
+
+OPENAI_MODEL_OPTIONS = {
+    # 你可以按需调整这些默认模型名
+    "gpt-4o-mini (OpenAI, Recommended)": "gpt-4o-mini",
+    "gpt-4o (OpenAI, Better quality)": "gpt-4o",
+}
+_OPENAI_MODEL_LABELS = tuple(OPENAI_MODEL_OPTIONS)
+
+
 SAMPLE_PROMPTS = [
     "Compare the average IMDB rating for each Genre across the whole dataset.",
     "Show how total Revenue (Millions) changed year by year between 2007 and 2016.",
@@ -62,6 +149,11 @@ if "df" not in st.session_state:
 if "pipeline_result" not in st.session_state:
     st.session_state.pipeline_result = None
 
+if "pipeline_state_json" not in st.session_state:
+    # Expander payload, computed once per pipeline run; dumping the whole
+    # nested state on every rerun is wasted work when nothing changed.
+    st.session_state.pipeline_state_json = None
+
 if "user_query" not in st.session_state:
     st.session_state.user_query = ""
 
@@ -77,53 +169,36 @@ st.sidebar.header("LLM & Data Settings")
 
 # --- Provider selection ---
 
-provider_label_to_value = {
-    "Groq": "groq",
-    "OpenAI": "openai",
-}
-provider_value_to_label = {v: k for k, v in provider_label_to_value.items()}
-
-current_provider_label = provider_value_to_label.get(
+current_provider_label = PROVIDER_VALUE_TO_LABEL.get(
     st.session_state.provider, "Groq"
 )
 
 selected_provider_label = st.sidebar.selectbox(
     "LLM Provider:",
-    options=list(provider_label_to_value.keys()),
-    index=list(provider_label_to_value.keys()).index(current_provider_label),
+    options=_PROVIDER_LABELS,
+    index=_PROVIDER_INDEX[current_provider_label],
 )
 
-st.session_state.provider = provider_label_to_value[selected_provider_label]
+st.session_state.provider = PROVIDER_LABEL_TO_VALUE[selected_provider_label]
 provider = st.session_state.provider  # "groq" or "openai"
 
 
 # --- Model selection per provider ---
 
-groq_model_options = {
-    "Llama 3.3 70B (Groq, Recommended)": "llama-3.3-70b-versatile",
-    "Llama 3.1 8B (Groq, Fast)": "llama-3.1-8b-instant",
-}
-
-openai_model_options = {
-    # 你可以按需调整这些默认模型名
-    "gpt-4o-mini (OpenAI, Recommended)": "gpt-4o-mini",
-    "gpt-4o (OpenAI, Better quality)": "gpt-4o",
-}
-
 if provider == "groq":
     model_label = st.sidebar.selectbox(
         "Groq Model:",
-        options=list(groq_model_options.keys()),
+        options=_GROQ_MODEL_LABELS,
         index=0,
     )
-    selected_model_name = groq_model_options[model_label]
+    selected_model_name = GROQ_MODEL_OPTIONS[model_label]
 else:
     model_label = st.sidebar.selectbox(
         "OpenAI Model:",
-        options=list(openai_model_options.keys()),
+        options=_OPENAI_MODEL_LABELS,
         index=0,
     )
-    selected_model_name = openai_model_options[model_label]
+    selected_model_name = OPENAI_MODEL_OPTIONS[model_label]
 
 st.session_state.selected_model_name = selected_model_name
 
@@ -155,13 +230,13 @@ uploaded_file = st.sidebar.file_uploader("Upload CSV file", type=["csv"])
 
 if st.sidebar.button("Load Sample IMDB Data"):
     try:
-        st.session_state.df = pd.read_csv("imdb_sample.csv")
+        st.session_state.df = _load_sample_csv("imdb_sample.csv")
         st.sidebar.success("Sample data loaded!")
     except FileNotFoundError:
         st.sidebar.error("Sample file not found (imdb_sample.csv)")
 
 if uploaded_file is not None:
-    st.session_state.df = pd.read_csv(uploaded_file)
+    st.session_state.df = _load_csv_bytes(uploaded_file.getvalue())
     st.sidebar.success(f"Uploaded: {uploaded_file.name}")
 
 # Dataset info
@@ -179,6 +254,7 @@ st.sidebar.markdown("---")
 if st.sidebar.button("Clear Data"):
     st.session_state.df = None
     st.session_state.pipeline_result = None
+    st.session_state.pipeline_state_json = None
     st.session_state.user_query = ""
     st.rerun()
 
@@ -188,7 +264,7 @@ if st.sidebar.button("Clear Data"):
 # =========================
 
 # 提示当前 provider
-st.caption(f"Current provider: **{provider_label_to_value.keys().__iter__().__next__() if False else selected_provider_label}**")
+st.caption(f"Current provider: **{selected_provider_label}**")
 
 if not current_api_key:
     st.info(f"Please enter your {selected_provider_label} API key in the sidebar to start.")
@@ -232,20 +308,28 @@ else:
     if run_clicked and user_query.strip():
         with st.spinner(f"Running Prompt-to-Vis pipeline via {selected_provider_label}..."):
             try:
-                result = run_pipeline(
-                    df=st.session_state.df,
-                    user_query=user_query,
-                    provider=provider,  # "groq" or "openai"
-                    model_name=st.session_state.selected_model_name,
-                    api_key=current_api_key,
-                    dataset_name=getattr(uploaded_file, "name", "uploaded_dataset")
+                result = _run_pipeline_cached(
+                    st.session_state.df,
+                    user_query,
+                    provider,  # "groq" or "openai"
+                    st.session_state.selected_model_name,
+                    current_api_key,
+                    getattr(uploaded_file, "name", "uploaded_dataset")
                     if uploaded_file is not None
                     else "sample_dataset",
                 )
                 st.session_state.pipeline_result = result
+                state: PipelineState = result["state"]
+                # model_dump_json streams straight to a string inside
+                # pydantic-core; no intermediate Python dict for st.json
+                # to re-serialize.
+                st.session_state.pipeline_state_json = state.model_dump_json(
+                    exclude={"final_spec"}
+                )
             except Exception as e:
                 st.error(f"Pipeline error: {e}")
                 st.session_state.pipeline_result = None
+                st.session_state.pipeline_state_json = None
 
     # Show results if available
     if st.session_state.pipeline_result is not None:
@@ -264,10 +348,15 @@ else:
         else:
             st.warning("No Vega-Lite spec was produced by the pipeline.")
 
-        # Pipeline internals
+        # Raw spec for copy/paste; serialized once by the backend (orjson),
+        # st.json accepts the pre-built string directly.
+        if result.get("spec_json"):
+            with st.expander("View Vega-Lite Spec (JSON)"):
+                st.json(result["spec_json"])
+
+        # Pipeline internals (JSON string precomputed when the run finished)
         with st.expander("View Pipeline State (Step Outputs)"):
-            state: PipelineState = result["state"]
-            st.json(state.model_dump(mode="json", exclude={"final_spec"}))
+            st.json(st.session_state.pipeline_state_json)
 
     # TODO[ui]:
     #   - Refactor this monolithic app into reusable components under src/frontend/components/
@@ -12,8 +12,46 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional, Literal, Union
-from pydantic import BaseModel, Field
+from enum import Enum
+from functools import cached_property
+from typing import Any, Dict, List, Optional, Literal, Tuple, Union
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
+
+
+# =========================
+# Closed vocabularies
+# =========================
+#
+# str-backed enums instead of Literal unions: pydantic-core validates an enum
+# with one dict membership rather than scanning a Literal tuple, which adds up
+# when constructing DatasetInfo for wide frames. With use_enum_values=True the
+# models store (and serialize) the plain strings, so comparisons like
+# `field.inferred_type == "categorical"` and the JSON wire format are
+# unchanged.
+
+class InferredType(str, Enum):
+    QUANTITATIVE = "quantitative"
+    CATEGORICAL = "categorical"
+    TEMPORAL = "temporal"
+    UNKNOWN = "unknown"
+
+
+class Intent(str, Enum):
+    COMPARE = "compare"
+    TREND = "trend"
+    DISTRIBUTION = "distribution"
+    CORRELATION = "correlation"
+    RANK = "rank"
+
+
+class MarkType(str, Enum):
+    BAR = "bar"
+    LINE = "line"
+    POINT = "point"
+    AREA = "area"
+    RECT = "rect"
+    ARC = "arc"
+    BOXPLOT = "boxplot"
 
 
 # =========================
@@ -23,8 +61,10 @@ from pydantic import BaseModel, Field
 class DatasetField(BaseModel):
     """Metadata about a single column in the dataset."""
 
+    model_config = ConfigDict(use_enum_values=True)
+
     name: str
-    inferred_type: Literal["quantitative", "categorical", "temporal", "unknown"]
+    inferred_type: InferredType
     description: Optional[str] = None
     example_values: Optional[List[Any]] = None
     is_integer: Optional[bool] = None  # True for integer-valued quantitative fields
@@ -43,6 +83,21 @@ class DatasetInfo(BaseModel):
     # Column-level information
     fields: List[DatasetField] = Field(default_factory=list)
 
+    # Dense in-memory views over `fields` for hot lookups (spec builder).
+    # cached_property keeps them out of the serialized contract — the list
+    # of DatasetField stays the wire/prompt format. Fields are treated as
+    # immutable after construction; mutate them and these go stale.
+
+    @cached_property
+    def field_names(self) -> Tuple[str, ...]:
+        """Field names in dataset order."""
+        return tuple(field.name for field in self.fields)
+
+    @cached_property
+    def integer_name_set(self) -> frozenset:
+        """Names of integer-valued quantitative fields."""
+        return frozenset(field.name for field in self.fields if field.is_integer)
+
 
 # =========================
 # Helper specs for steps
@@ -139,6 +194,11 @@ class Step1Output(BaseModel):
     column_roles: Dict[str, Literal["quantitative", "categorical", "temporal"]]
     reasoning: str
 
+    @cached_property
+    def selected_set(self) -> frozenset:
+        """Membership view over selected_columns; the list stays on the wire."""
+        return frozenset(self.selected_columns)
+
 
 class Step2Output(BaseModel):
     """
@@ -153,10 +213,36 @@ class Step2Output(BaseModel):
     }
     """
 
-    intent: Literal["compare", "trend", "distribution", "correlation", "rank"]
+    model_config = ConfigDict(use_enum_values=True)
+
+    intent: Intent
     target_columns: List[str]
     reasoning: str
 
+    @cached_property
+    def target_set(self) -> frozenset:
+        """Membership view over target_columns; the list stays on the wire."""
+        return frozenset(self.target_columns)
+
+
+class Step12Output(BaseModel):
+    """
+    Fused Step 1+2 — one LLM call returning both outputs.
+
+    Expected JSON (docs/06_prompts.md, "Fused Step 1+2"):
+
+    {
+      "step1": { ...Step1Output... },
+      "step2": { ...Step2Output... }
+    }
+
+    The pipeline splits this back into PipelineState.step1 / .step2, so the
+    downstream steps are unaware of whether the fused path was used.
+    """
+
+    step1: Step1Output
+    step2: Step2Output
+
 
 class Step3Output(BaseModel):
     """
@@ -181,6 +267,11 @@ class Step3Output(BaseModel):
     group_by: List[str] = Field(default_factory=list)
     reasoning: str
 
+    @cached_property
+    def group_by_set(self) -> frozenset:
+        """Membership view over group_by; the list stays on the wire."""
+        return frozenset(self.group_by)
+
 
 class Step4Output(BaseModel):
     """
@@ -194,7 +285,9 @@ class Step4Output(BaseModel):
     }
     """
 
-    mark_type: Literal["bar", "line", "point", "area", "rect", "arc", "boxplot"]
+    model_config = ConfigDict(use_enum_values=True)
+
+    mark_type: MarkType
     justification: str
 
 
@@ -258,3 +351,8 @@ class PipelineState(BaseModel):
 
     # Filled by spec_builder
     final_spec: Optional[Dict[str, Any]] = None
+
+    # Cache of each step output's prompt-ready JSON string, filled by the
+    # pipeline as steps complete. Private: not part of the serialized
+    # contract, purely avoids re-serializing step1's output in steps 2-6.
+    _step_json: Dict[str, str] = PrivateAttr(default_factory=dict)